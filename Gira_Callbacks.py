@@ -0,0 +1,114 @@
+import ssl
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import Gira_Classes
+
+
+#service events after which the uid configuration of the X1 is a different one
+_CONFIG_EVENTS = frozenset(("projectConfigChanged", "uiConfigChanged"))
+
+
+class CallbackServer:
+
+    def __init__ (self, control, host: str, port: int = 5523, certfile: str = None, keyfile: str = None):
+        """
+        This is a small server the X1 sends its service and value events to
+        the values are stored on the devices of the GiraControl, so they don't have to be polled
+
+        control: GiraControl = the control whose devices are updated
+        host: str            = IP-Adress of this computer as the X1 can reach it
+        port: int            = port the server listens on
+        certfile: str        = certificate for HTTPS (the X1 only calls HTTPS urls, without it plain HTTP is used e.g. behind a proxy)
+        keyfile: str         = private key of the certificate
+
+        server = CallbackServer(control, '192.168.0.10', certfile='cert.pem', keyfile='key.pem')
+        server.start()
+        control.register_callbacks(server.service_url, server.value_url, testCallbacks=True)
+
+        (control.start_callback_server does all of this and lets the devices trust the pushed values)
+        """
+        self.control = control
+        self.host = host
+        self.port = port
+
+        self._server = ThreadingHTTPServer((host, port), _CallbackHandler)
+        self._server.callback_server = self
+        self._thread = None
+
+        scheme = 'http'
+        if certfile != None:
+            context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            context.load_cert_chain(certfile, keyfile)
+            self._server.socket = context.wrap_socket(self._server.socket, server_side=True)
+            scheme = 'https'
+
+        self.service_url = f'{scheme}://{host}:{port}/service'
+        self.value_url = f'{scheme}://{host}:{port}/value'
+
+    def start (self):
+        """
+        Starts the server in a background thread
+        """
+        if self._thread == None:
+            self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+            self._thread.start()
+
+    def stop (self):
+        """
+        Stops the server
+        """
+        #the devices of the control have to poll again
+        if self.control.callback_server is self:
+            self.control.stop_callback_server()
+            return
+
+        if self._thread != None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+
+    def handle (self, path: str, payload: dict) -> bool:
+        """
+        Handles the payload of one callback
+        returns False if the callback does not belong to the token of the control
+        raises a ValueError if the events are no list
+        """
+        if payload.get('token') != self.control.token:
+            return False
+
+        events = payload.get('events', [])
+        if not isinstance(events, list):
+            raise ValueError(f'events has to be a list but is {type(events)}')
+        if path == '/value':
+            self.control.apply_values(events)
+        elif path == '/service':
+            if any(isinstance(event, dict) and event.get('event') in _CONFIG_EVENTS for event in events):
+                self.control.invalidate_config()
+        return True
+
+
+class _CallbackHandler (BaseHTTPRequestHandler):
+
+    def do_POST (self):
+        #anything that is no JSON object with a list of events is answered with 400
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            if length < 0:
+                raise ValueError(f'Content-Length {length}')
+            payload = Gira_Classes.json_loads(self.rfile.read(length))
+            if not isinstance(payload, dict):
+                raise ValueError(f'payload has to be an object but is {type(payload)}')
+            handled = self.server.callback_server.handle(self.path, payload)
+        except ValueError:
+            self.send_response(400)
+            self.end_headers()
+            return
+
+        self.send_response(200 if handled else 403)
+        self.end_headers()
+
+    def log_message (self, format, *args):
+        #the X1 calls very often, so the requests are not logged
+        pass
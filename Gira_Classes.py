@@ -1,122 +1,455 @@
+import asyncio
+import operator
+import sys
+import time
 import requests
+import urllib3
 import json
+from concurrent.futures import Executor
+from requests.adapters import HTTPAdapter
 from typing import Any
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 #NOTES
 #O MEANS OPTIONAL AND DOES NOT HAVE TO OCCOUR IN THE CONFIG FILE
 #LENGTH OF DATAPOINTSLIST HAS TO BE CHECKED FIRST 
 #ELSE THE PROGRAM COULD RUN INTO INDEX ERRORS OF THE DATAPOINTSLIST
 
+
+#default seconds a device trusts its values without asking the X1 (update_values and toggle)
+VALUES_TTL = 0.5
+TOGGLE_CACHE_TTL = 2
+
+#the bodies for switching on and off are always the same, so they are only encoded once
+_BODY_CACHE = {0: b'{"value":0}', 1: b'{"value":1}'}
+
+#the X1 sends binary values as '1'/'0' strings, value events and other firmware versions may use numbers or bools
+_ON_VALUES = frozenset((True, '1', 'true', 'True'))
+
+
+def json_loads (content: bytes) -> Any:
+    """
+    Parses a JSON body (orjson is used if it is installed)
+    """
+    if orjson != None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+def json_dumps (obj: Any, indent: bool = False) -> bytes:
+    """
+    Encodes obj to a JSON body (orjson is used if it is installed)
+
+    indent: bool = pretty print with an indentation of 2
+    """
+    if orjson != None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else None)
+    return json.dumps(obj, indent=2 if indent else None, separators=None if indent else (',', ':')).encode()
+
+
+#ip of the X1 -> Session of the devices that are used without a GiraControl
+_SESSIONS = {}
+
+#headers of every request of a device with keep_alive=False, the X1 closes the connection after answering
+_CLOSE_HEADERS = {'Connection': 'close'}
+
+
+def _value_body (value: Any) -> bytes:
+    """
+    Returns the body for setting one value
+    whole numbers (most of all 0 and 1) are written straight into the bytes, without the JSON encoder
+    """
+    if type(value) == int:
+        body = _BODY_CACHE.get(value)
+        return body if body != None else b'{"value":%d}' % value
+    return json_dumps({ "value" : value })
+
+
+def _new_session (ip: str) -> requests.Session:
+    """
+    Returns the Session for devices that are used without a GiraControl
+    all of them that talk to the same X1 share one, so its connections are reused
+    """
+    session = _SESSIONS.get(ip)
+    if session == None:
+        session = requests.Session()
+        session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=8, max_retries=0))
+        #the X1 can not provide a trusted certificate, this Session does not check it, so urllib3 must not warn on every request
+        session.verify = False
+        urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+        session.headers['Content-Type'] = 'application/json'
+        session.headers['Connection'] = 'keep-alive'
+        _SESSIONS[ip] = session
+    return session
+
+
+#channelType of a function -> class handling it, channel types without a class are skipped
+#every subclass of GiraDevice with its own channelType is added by GiraDevice.__init_subclass__
+DEVICE_REGISTRY = {}
+
+
 #Objects for Every Kind of channelType need to be created
-class KNXDimmer:
-    
-    def __init__ (self, ip, token, config):
+class GiraDevice:
+
+    __slots__ = ("ip", "_token", "_s", "displayName", "functionType", "uid",
+                 "_values_base", "_values_url", "_bulk_url", "_dp_urls", "_uid_to_attr", "values_ttl", "_values_ts",
+                 "_values_etag", "_known_ts", "_headers", "executor")
+
+    #channelType of the functions handled by the class
+    channelType = None
+
+    #name of a datapoint -> prefix of its attributes (<prefix>_uid, <prefix>_value)
+    _DATAPOINTS = {}
+    #prefixes of the optional datapoints, they also get a <prefix>_exist attribute
+    _OPTIONAL = frozenset()
+    #prefixes of datapoints whose writes are commands (e.g. a step), they are sent even if the value is the same
+    _COMMANDS = frozenset()
+
+    #built by __init_subclass__ from the tables above, with the attribute names interned once for all devices
+    #name of a datapoint -> (<prefix>_uid, <prefix>_value, <prefix>_exist or None)
+    _ATTRS = {}
+    _EXIST_ATTRS = ()
+    _COMMAND_ATTRS = frozenset()
+
+    def __init_subclass__ (cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        #only classes that name a channelType themselves handle it, not their subclasses by inheriting it
+        if cls.__dict__.get('channelType') != None:
+            #interned, so a lookup with an interned channelType of the configuration is a pointer compare
+            DEVICE_REGISTRY[sys.intern(cls.channelType)] = cls
+
+        attrs = {}
+        for name, prefix in cls._DATAPOINTS.items():
+            exist = sys.intern(f'{prefix}_exist') if prefix in cls._OPTIONAL else None
+            attrs[sys.intern(name)] = (sys.intern(f'{prefix}_uid'), sys.intern(f'{prefix}_value'), exist)
+        cls._ATTRS = attrs
+        cls._EXIST_ATTRS = tuple(sys.intern(f'{prefix}_exist') for prefix in cls._OPTIONAL)
+        cls._COMMAND_ATTRS = frozenset(sys.intern(f'{prefix}_value') for prefix in cls._COMMANDS)
+
+    @classmethod
+    def create (cls, ip, token, config, session: requests.Session = None, keep_alive: bool = True):
+        """
+        Creates the device object of the class registered for the channelType of the function
+
+        returns None if there is no class for the channelType
+        """
+        #no sys.intern here, the configs of a GiraControl are interned once by _index_config and the dict lookup works for any str
+        device_cls = DEVICE_REGISTRY.get(config['channelType'])
+        if device_cls is None:
+            return None
+        return device_cls(ip=ip, token=token, config=config, session=session, keep_alive=keep_alive)
+
+    def __init__ (self, ip, token, config, session: requests.Session = None, keep_alive: bool = True):
         """
-        This is a KNX Dimmer
+        This is the base of all devices, it holds what every function of the uid configuration has
+
+        session: requests.Session = shared session of the GiraControl (if left empty the devices of one X1 share their own)
+        keep_alive: bool          = only used without a session, if False every request asks the X1 to close the connection after answering
         """
-        requests.packages.urllib3.disable_warnings()
         #Important values for PUT,GET,POST,...
         self.ip = ip
-        self.token = token
-        
-        #Values Defining the Dimmer in the Network
-        self.channelType = "de.gira.schema.channels.KNX.Dimmer"
+        self._s = session if session != None else _new_session(ip)
+        #keep_alive=False sends Connection: close with every request through the shared Session (for scripts that only send one command)
+        self._headers = _CLOSE_HEADERS if session == None and not keep_alive else None
+
+        #Values Defining the Device in the Network
         self.displayName = config['displayName']
         self.functionType = config['functionType']
         self.uid = config['uid']
 
-        datapoints = config['dataPoints']
+        #the urls of the device and its datapoints are build by the token setter
+        self._values_base = f'https://{ip}/api/values'
+        self._dp_urls = dict.fromkeys(dp['uid'] for dp in config['dataPoints'])
+        self.token = token
 
-        #M/O: Whether the data point is Mandatory (always required) or Optional
-        #R/W/E: Whether the data point can support Reading/Writing/Eventing. When a data point
+        #uid of a datapoint -> attribute its value is stored in
+        self._uid_to_attr = {}
+        self._parse_datapoints(config['dataPoints'])
 
-        self.Shift_exist = False
-        self.Brightness_exist = False
+        #seconds after an update in which update_values does not ask the X1 again
+        self.values_ttl = VALUES_TTL
+        self._values_ts = 0
+        #ETag of the last answer, if the X1 sends one it can answer 304 when nothing has changed
+        self._values_etag = None
+        #uid of a datapoint -> time its value was last received or written
+        self._known_ts = {}
 
-        for datapoint in datapoints:
+        #thread pool of the async methods, None is the default executor of the event loop (a GiraControl sets its own)
+        self.executor = None
 
-            if datapoint['name'] == "OnOff":
-                # M | RWE | BINARY[1,0] - Toggle to trun light on or of - 
-                self.OnOff_uid = datapoint['uid']
-                self.OnOff_value = None           
+    @property
+    def token (self) -> str:
+        """
+        The token the device uses for the X1
+        """
+        return self._token
 
-            if datapoint['name'] == "Shift":
-                # O | -W- | PERCENTAGEE[0,0.01,...,0.99,1]
-                self.Shift_uid = datapoint['uid']
-                self.Shift_value = None
-                self.Shift_exist = True
+    @token.setter
+    def token (self, token: str):
+        #the value urls of the device and of each datapoint contain the token, so they are only rebuild when it changes
+        self._token = token
+        self._values_url = f'{self._values_base}/{self.uid}?token={token}'
+        self._bulk_url = f'{self._values_base}?token={token}'
+        self._dp_urls = {uid: f'{self._values_base}/{uid}?token={token}' for uid in self._dp_urls}
 
-            if datapoint['name'] == "Brightness":
-                # O | RWE | PERCENT[0,...,100]
-                self.Brightness_uid = datapoint['uid']
-                self.Brightness_value = None
-                self.Brightness_exist = True            
+    def _parse_datapoints (self, datapoints: list):
+        """
+        Creates the attributes of all datapoints of the class that are in the configuration
+        """
+        for exist in self._EXIST_ATTRS:
+            setattr(self, exist, False)
 
+        attrs = self._ATTRS
+        for datapoint in datapoints:
+            names = attrs.get(datapoint['name'])
+            if names == None:
+                continue
+
+            uid_attr, value_attr, exist = names
+            setattr(self, uid_attr, datapoint['uid'])
+            setattr(self, value_attr, None)
+            self._uid_to_attr[datapoint['uid']] = value_attr
+            if exist != None:
+                setattr(self, exist, True)
+
+    def apply_value (self, uid: str, value: Any) -> bool:
+        """
+        Stores the value of one datapoint of the device
+        used for the answers of update_values and for the events of a value callback
 
-    def update_values (self):
+        returns False if the uid is no datapoint of the device
         """
-        This method updates the Dimmer values to the current status
+        attr = self._uid_to_attr.get(uid)
+        if attr == None:
+            return False
+
+        setattr(self, attr, value)
+        self._known_ts[uid] = time.monotonic()
+        return True
+
+    def apply_written (self, changes: list):
         """
-        try:
-            url = f'https://{self.ip}/api/values/{self.uid}?token={self.token}'
-            response = requests.get(url, verify=False)
-            flag = True
-        except Exception as e:
-            response = e
-            flag = False
-        
-        if flag:
-            if str(response).endswith('[200]>'):
-                values = response.json()['values']
-                self.OnOff_value = values[0]['value']
-
-                if self.Shift_exist:
-                    self.Shift_value = values[1]['value']
-                if self.Brightness_exist:
-                    self.Brightness_value = values[2]['value']
-
-                return True
-            else:
-                return f'Something went wrong {response}'
-        else:
-            return f'Something went wrong {response}'
+        Stores the values that were just written to the X1
 
-    def toggle(self):
+        changes: list = list of (uid, value) tuples
         """
-        toggles the OnOff
+        #the values are known now (the X1 sends all values as strings), but the X1 changes other values
+        #with them (e.g. Brightness with OnOff), so the next update and set_value_ ask again
+        self._known_ts.clear()
+        for uid, value in changes:
+            self.apply_value(uid, str(value))
+        self._values_ts = 0
+
+    def update_values (self, force: bool = False):
+        """
+        This method updates the device values to the current status
+
+        force: bool = ask the X1 even if the values are younger than values_ttl seconds
         """
-        if self.update_values() == True:
-            if self.OnOff_value == '1':
-                flag = self.set_value_(self.OnOff_uid,0)
-                return flag
-            else:
-                flag = self.set_value_(self.OnOff_uid,1)
-                return flag
-        else:
-            return f'Values could not be updated'
+        if not force and time.monotonic() - self._values_ts < self.values_ttl:
+            return True
+
+        headers = self._headers
+        if self._values_etag != None:
+            headers = {'If-None-Match': self._values_etag} if headers == None else {**headers, 'If-None-Match': self._values_etag}
+        try:
+            response = self._s.get(self._values_url, headers=headers)
+        except requests.RequestException as e:
+            return f'Something went wrong {e}'
+
+        if response.status_code == 304:
+            #nothing has changed since the last answer
+            self._values_ts = time.monotonic()
+            return True
+
+        if response.status_code == 200:
+            self._values_etag = response.headers.get('ETag')
+            #the values are matched by uid, so their order in the answer does not matter
+            for datapoint in json_loads(response.content)['values']:
+                self.apply_value(datapoint['uid'], datapoint['value'])
+
+            self._values_ts = time.monotonic()
+            return True
+        return f'Something went wrong {response}'
 
     def set_value_ (self, uid: str, value: Any):
         """
         Sets 1 value to one specific uid/Datapoint
+        nothing is sent if the datapoint already has the value since less than values_ttl seconds
         """
+        attr = self._uid_to_attr.get(uid)
+        known = self._known_ts.get(uid)
+        if known != None and time.monotonic() - known < self.values_ttl and attr not in self._COMMAND_ATTRS:
+            if getattr(self, attr) == str(value):
+                return f'Everything went right'
 
+        url = self._dp_urls.get(uid) or f'{self._values_base}/{uid}?token={self._token}'
         try:
-            url = f'https://{self.ip}/api/values/{uid}?token={self.token}'
-            body = { "value" : value }
-            response = requests.put(url, json=body, verify=False)
-            flag = True
-        except Exception as e:
-            response = e
-            flag = False
-
-        if flag:
-            if str(response).endswith('[200]>'):
-                return f'Everything went right'
-            else:
-                return f'Something went wrong {response}'
-        else:
-            return f'Something went wrong {response}'   
+            response = self._s.put(url, data=_value_body(value), headers=self._headers)
+        except requests.RequestException as e:
+            return f'Something went wrong {e}'
+
+        if response.status_code == 200:
+            self.apply_written([(uid, value)])
+            return f'Everything went right'
+        return f'Something went wrong {response}'
+
+    def _write_constant (self, prefix: str, value: int):
+        """
+        Sets a fixed value (e.g. 1 for on) to the datapoint with the attribute prefix
+        returns False if the device does not have the datapoint
+        """
+        uid = getattr(self, f'{prefix}_uid', None)
+        if uid == None:
+            return False
+        return self.set_value_(uid, value)
+
+    async def aset_value (self, uid: str, value: Any, executor: Executor = None):
+        """
+        async version of set_value_, while it waits for the X1 the event loop can go on with other tasks
+
+        executor: Executor = thread pool the request runs in (if left empty the executor of the device)
+
+        await asyncio.gather(*(device.aset_value(device.OnOff_uid, 0) for device in devices))
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor if executor != None else self.executor, self.set_value_, uid, value)
+
+    def set_values_ (self, changes: list):
+        """
+        Sets the values of several uids/Datapoints of the device with one request
+
+        changes: list = list of (uid, value) tuples
+        """
+        body = {"values": [{"uid": uid, "value": value} for uid, value in changes]}
+        try:
+            response = self._s.put(self._bulk_url, data=json_dumps(body), headers=self._headers)
+        except requests.RequestException as e:
+            return f'Something went wrong {e}'
+
+        if response.status_code == 200:
+            self.apply_written(changes)
+            return f'Everything went right'
+        return f'Something went wrong {response}'
+
+    def set_many (self, updates: dict):
+        """
+        Sets several datapoints of the device by their names with one request
+
+        updates: dict = name of the datapoint -> value
+
+        dimmer.set_many({"OnOff": 1, "Brightness": 60})
+        raises a ValueError if the device does not have one of the datapoints
+        """
+        return self.set_values_([(self.datapoint_uid(name), value) for name, value in updates.items()])
+
+    def datapoint_uid (self, name: str) -> str:
+        """
+        Returns the uid of the datapoint with the name as in the config (e.g. 'Step-Up-Down') or as in the attributes (e.g. 'Step_Up_Down')
+        raises a ValueError if the device does not have the datapoint
+        """
+        names = self._ATTRS.get(name)
+        uid = getattr(self, names[0] if names != None else f'{name}_uid', None)
+        if uid == None:
+            raise ValueError(f'{name} is no datapoint of {self.displayName}')
+        return uid
+
+class OnOffDevice (GiraDevice):
+
+    __slots__ = ("toggle_cache_ttl", "_onoff_ts", "_on", "OnOff_uid", "OnOff_value")
+
+    def __init__ (self, ip, token, config, session: requests.Session = None, keep_alive: bool = True):
+        """
+        This is the base of all devices with an OnOff datapoint
+
+        session: requests.Session = shared session of the GiraControl (if left empty the devices of one X1 share their own)
+        keep_alive: bool          = only used without a session, if False every request asks the X1 to close the connection after answering
+        """
+        super().__init__(ip, token, config, session, keep_alive)
+
+        self.OnOff_value = None
+        self._onoff_ts = 0
+        #OnOff_value as bool, it is worked out once when the value arrives
+        self._on = None
+
+        #seconds the last known OnOff value is trusted by toggle
+        self.toggle_cache_ttl = TOGGLE_CACHE_TTL
+
+    def apply_value (self, uid: str, value: Any) -> bool:
+        if not super().apply_value(uid, value):
+            return False
+        if uid == self.OnOff_uid:
+            #a pushed value can be anything (e.g. a list), only str/int/bool can be looked up in the set
+            self._on = isinstance(value, (str, int)) and value in _ON_VALUES
+            self._onoff_ts = time.monotonic()
+        return True
+
+    @property
+    def is_on (self) -> bool:
+        """
+        True if the device is on, False if it is off and None if the OnOff value is not known yet
+        """
+        return self._on
+
+    def turn_on (self):
+        """
+        switches the OnOff on
+        """
+        return self._write_constant('OnOff', 1)
+
+    def turn_off (self):
+        """
+        switches the OnOff off
+        """
+        return self._write_constant('OnOff', 0)
+
+    async def aturn_on (self):
+        """
+        async version of turn_on
+        """
+        return await self.aset_value(self.OnOff_uid, 1)
+
+    async def aturn_off (self):
+        """
+        async version of turn_off
+        """
+        return await self.aset_value(self.OnOff_uid, 0)
+
+    def toggle(self):
+        """
+        toggles the OnOff
+        the last known OnOff value is used if it is younger than toggle_cache_ttl seconds,
+        else it is updated first
+        """
+        if self._on == None or time.monotonic() - self._onoff_ts >= self.toggle_cache_ttl:
+            if self.update_values() != True:
+                return f'Values could not be updated'
+
+        new = 0 if self._on else 1
+        #set_value_ stores the new OnOff value, so the next toggle does not have to ask the X1
+        return self.set_value_(self.OnOff_uid,new)
+
+class KNXDimmer (OnOffDevice):
+
+    __slots__ = ("Shift_uid", "Shift_value", "Shift_exist",
+                 "Brightness_uid", "Brightness_value", "Brightness_exist")
+
+    channelType = "de.gira.schema.channels.KNX.Dimmer"
+
+    #M/O: Whether the data point is Mandatory (always required) or Optional
+    #R/W/E: Whether the data point can support Reading/Writing/Eventing. When a data point
+    _DATAPOINTS = {
+        "OnOff": "OnOff",               # M | RWE | BINARY[1,0] - Toggle to trun light on or of - 
+        "Shift": "Shift",               # O | -W- | PERCENTAGEE[0,0.01,...,0.99,1]
+        "Brightness": "Brightness",     # O | RWE | PERCENT[0,...,100]
+    }
+    _OPTIONAL = frozenset(("Shift", "Brightness"))
+    _COMMANDS = frozenset(("Shift",))
 
     def dimm_to (self, percent:float):
         """
@@ -130,46 +463,19 @@ class KNXDimmer:
         except:
             return False
 
-class Switch:
+class Switch (OnOffDevice):
 
-    def __init__ (self, ip, token, config):
-        """
-        This is a KNX Switch
-        """
-        requests.packages.urllib3.disable_warnings()
-        #Important values for PUT,GET,POST,...
-        self.ip = ip
-        self.token = token
-        
-        #Values Defining the Dimmer in the Network
-        self.channelType = "de.gira.schema.channels.Switch"
-        self.displayName = config['displayName']
-        self.functionType = config['functionType']
-        self.uid = config['uid']
+    __slots__ = ()
 
-        datapoints = config['dataPoints']
+    channelType = "de.gira.schema.channels.Switch"
 
+    def _parse_datapoints (self, datapoints: list):
         #M/O: Whether the data point is Mandatory (always required) or Optional
         #R/W/E: Whether the data point can support Reading/Writing/Eventing. When a data point
 
-
         # M | RWE | BINARY[1,0] - Toggle to trun light on or of - 
         self.OnOff_uid = datapoints[0]['uid']
-        self.OnOff_value = None
-
-    def toggle(self):
-        """
-        toggles the OnOff
-        """
-        if self.update_values() == True:
-            if self.OnOff_value == '1':
-                flag = self.set_value_(self.OnOff_uid,0)
-                return flag
-            else:
-                flag = self.set_value_(self.OnOff_uid,1)
-                return flag
-        else:
-            return f'Values could not be updated'
+        self._uid_to_attr[self.OnOff_uid] = 'OnOff_value'
 
     def set_value_ (self, uid: str, value: int):
         """
@@ -179,138 +485,91 @@ class Switch:
         if value != 0 and value != 1:
             raise ValueError(f'Value is not 1 or 0 instead it is {value}')
 
-        try:
-            url = f'https://{self.ip}/api/values/{uid}?token={self.token}'
-            body = { "value" : value }
-            response = requests.put(url, json=body, verify=False)
-            flag = True
-        except Exception as e:
-            response = e
-            flag = False
-
-        if flag:
-            if str(response).endswith('[200]>'):
-                return f'Everything went right'
-            else:
-                return f'Something went wrong {response}'
-        else:
-            return f'Something went wrong {response}' 
+        return super().set_value_(uid, value)
+
+class BlindWithPos (GiraDevice):
+
+    __slots__ = ("Step_Up_Down_uid", "Step_Up_Down_value", "Up_Down_uid", "Up_Down_value",
+                 "Position_uid", "Position_value", "Position_exist",
+                 "Slat_Position_uid", "Slat_Position_value", "Slat_Position_exist")
+
+    channelType = "de.gira.schema.channels.BlindWithPos"
+
+    #M/O: Whether the data point is Mandatory (always required) or Optional
+    #R/W/E: Whether the data point can support Reading/Writing/Eventing. When a data point
+    _DATAPOINTS = {
+        "Step-Up-Down": "Step_Up_Down",     # M | -W- | BINARY[1,0] - ? - 
+        "Up-Down": "Up_Down",               # M | -W- | BINARY[1,0] - ? -
+        "Position": "Position",             # O | RWE | PERCENT[0,...,100]
+        "Slat-Position": "Slat_Position",   # O | RWE | PERCENT[0,...,100]
+    }
+    _OPTIONAL = frozenset(("Position", "Slat_Position"))
+    _COMMANDS = frozenset(("Step_Up_Down", "Up_Down"))
 
-    def update_values (self):
+    #KNX: 0 moves/steps up, 1 moves/steps down
+    def move_up (self):
         """
-        This method updates the Switch values to the current status
+        moves the Blind all the way up
         """
-        try:
-            url = f'https://{self.ip}/api/values/{self.uid}?token={self.token}'
-            response = requests.get(url, verify=False)
-            flag = True
-        except Exception as e:
-            response = e
-            flag = False
-        
-        if flag:
-            if str(response).endswith('[200]>'):
-                values = response.json()['values']
-                self.OnOff_value = values[0]['value']
-                return True
-            else:
-                return f'Something went wrong {response}'
-        else:
-            return f'Something went wrong {response}'
-
-class BlindWithPos:
-    
-    def __init__ (self, ip, token, config):
-        """
-        This is a KNX Blind with Position
-        """
-        requests.packages.urllib3.disable_warnings()
-        #Important values for PUT,GET,POST,...
-        self.ip = ip
-        self.token = token
-        
-        #Values Defining the Dimmer in the Network
-        self.channelType = "de.gira.schema.channels.BlindWithPos"
-        self.displayName = config['displayName']
-        self.functionType = config['functionType']
-        self.uid = config['uid']
+        return self._write_constant('Up_Down', 0)
 
-        datapoints = config['dataPoints']
+    def move_down (self):
+        """
+        moves the Blind all the way down
+        """
+        return self._write_constant('Up_Down', 1)
 
-        #M/O: Whether the data point is Mandatory (always required) or Optional
-        #R/W/E: Whether the data point can support Reading/Writing/Eventing. When a data point
+    def step_up (self):
+        """
+        moves the Blind one step up (or stops it while it is moving)
+        """
+        return self._write_constant('Step_Up_Down', 0)
 
-        self.Position_exist = False
-        self.Slat_Position_exist = False
+    def step_down (self):
+        """
+        moves the Blind one step down (or stops it while it is moving)
+        """
+        return self._write_constant('Step_Up_Down', 1)
 
-        for datapoint in datapoints:
 
-            if datapoint['name'] == "Step-Up-Down":
-                # M | -W- | BINARY[1,0] - ? - 
-                self.Step_Up_Down_uid = datapoint['uid']
-                self.Step_Up_Down_value = None         
+class DimmerRGBW (OnOffDevice):
 
-            if datapoint['name'] == "Up-Down":
-                # M | -W- | BINARY[1,0] - ? -
-                self.Up_Down_uid = datapoint['uid']
-                self.Up_Down_value = None
+    __slots__ = ("Brightness_uid", "Brightness_value",
+                 "Red_uid", "Red_value", "Green_uid", "Green_value", "Blue_uid", "Blue_value",
+                 "White_uid", "White_value", "White_exist")
 
-            if datapoint['name'] == "Position":
-                # O | RWE | PERCENT[0,...,100]
-                self.Position_uid = datapoint['uid']
-                self.Position_value = None
-                self.Position_exist = True 
+    channelType = "de.gira.schema.channels.DimmerRGBW"
 
-            if datapoint['name'] == "Slat-Position":
-                # O | RWE | PERCENT[0,...,100]
-                self.Slat_Position_uid = datapoint['uid']
-                self.Slat_Position_value = None
-                self.Slat_Position_exist = True
+    #M/O: Whether the data point is Mandatory (always required) or Optional
+    #R/W/E: Whether the data point can support Reading/Writing/Eventing. When a data point
+    _DATAPOINTS = {
+        "OnOff": "OnOff",               # M | RWE | BINARY[1,0]
+        "Brightness": "Brightness",     # M | RWE | PERCENT[0,...,100]
+        "Red": "Red",                   # M | RWE | PERCENT[0,...,100]
+        "Green": "Green",               # M | RWE | PERCENT[0,...,100]
+        "Blue": "Blue",                 # M | RWE | PERCENT[0,...,100]
+        "White": "White",               # O | RWE | PERCENT[0,...,100]
+    }
+    _OPTIONAL = frozenset(("White",))
 
-    def update_values (self):
+    def dimm_to (self, percent:float):
         """
-        This method updates the Blind with Position values to the current status
+        Dimms the Light to the given percentage
         """
-        try:
-            url = f'https://{self.ip}/api/values/{self.uid}?token={self.token}'
-            response = requests.get(url, verify=False)
-            flag = True
-        except Exception as e:
-            response = e
-            flag = False
-        
-        if flag:
-            if str(response).endswith('[200]>'):
-                values = response.json()['values']
-
-                for datapoint in values:
-                    uid = datapoint['uid']
-                    value = datapoint['value']
-
-                    if uid == self.Step_Up_Down_uid:
-                        self.Step_Up_Down_value = value
-                    elif uid == self.Up_Down_uid:
-                        self.Step_Up_Down_value = value
-                    
-                    if self.Position_exist:
-                        if uid == self.Position_uid:
-                            self.Position_value = value
-                    
-                    if self.Slat_Position_exist:
-                        if uid == self.Slat_Position_uid:
-                            self.Slat_Position_value = value
-
-
-                return True
-            else:
-                return f'Something went wrong {response}'
-        else:
-            return f'Something went wrong {response}'
-
-
-        
-class DimmerRGBW:
-    pass
+        return self.set_value_(self.Brightness_uid, percent)
+
+    def set_color (self, red:float, green:float, blue:float, white:float = None):
+        """
+        Sets the color of the Light, all values are percentages
+        all colors are set with one request
+
+        white: float = only used if White exists (if left empty it is not changed)
+        """
+        changes = [(self.Red_uid, red), (self.Green_uid, green), (self.Blue_uid, blue)]
+        if white != None and self.White_exist:
+            changes.append((self.White_uid, white))
+
+        return self.set_values_(changes)
 
 class DimmerWhite:
     pass
@@ -345,20 +604,56 @@ class Camera:
 class Link:
     pass
 
-class Binary:
-    pass
-
-class DWord:
-    pass
-
-class String:
-    pass
+class ValueDevice (GiraDevice):
 
-class Byte:
-    pass
+    __slots__ = ()
 
-class Percent:
-    pass
+    #names of the attributes of the one datapoint, set by _value_device
+    #the class made by _value_device also gets the property value, the last known value of the datapoint
+    _UID_ATTR = None
+    _VALUE_ATTR = None
 
-class Temperature:
-    pass
+    def set (self, value: Any):
+        """
+        Sets the value of the datapoint
+        """
+        return self.set_value_(getattr(self, self._UID_ATTR), value)
+
+
+def _value_device (name: str) -> type:
+    """
+    Creates the class of a value type, these functions have one datapoint that is named like the type
+    e.g. Percent has the datapoint Percent, its uid and value are in Percent_uid and Percent_value
+    """
+    uid_attr = sys.intern(f'{name}_uid')
+    value_attr = sys.intern(f'{name}_value')
+    return type(name, (ValueDevice,), {
+        "__slots__": (uid_attr, value_attr),
+        "__module__": __name__,
+        "__doc__": f"This is a value of the type {name}",
+        "channelType": f"de.gira.schema.channels.{name}",
+        "_DATAPOINTS": {name: name},
+        "_UID_ATTR": uid_attr,
+        "_VALUE_ATTR": value_attr,
+        #the getter is made by operator.attrgetter, so reading it runs no python code of its own
+        "value": property(operator.attrgetter(value_attr), doc=f"The last known value of {name}"),
+    })
+
+
+Binary = _value_device("Binary")
+DWord = _value_device("DWord")
+Integer = _value_device("Integer")
+Float = _value_device("Float")
+String = _value_device("String")
+Byte = _value_device("Byte")
+Percent = _value_device("Percent")
+Temperature = _value_device("Temperature")
+
+
+def create_device (config: dict, ip: str, token: str, session: requests.Session = None, keep_alive: bool = True):
+    """
+    Creates the device object for one function of the uid configuration
+
+    returns None if there is no class for the channelType of the function
+    """
+    return GiraDevice.create(ip, token, config, session=session, keep_alive=keep_alive)
@@ -1,36 +1,178 @@
+import asyncio
+import functools
+import hashlib
+import inspect
+import os
+import sys
+import time
 import requests
-import json
+from concurrent.futures import ThreadPoolExecutor
+import urllib3
+from requests.adapters import HTTPAdapter
+from typing import Any
 
-from zmq import device
+import Gira_Callbacks
 import Gira_Classes
 
+#answers of the X1 for DELETE /api/v2/clients/<token>
+_UNREGISTER_MSGS = {
+    204: "Client was successfully unregistered.",
+    401: "The token cannot be found.",
+    423: "The device is currently locked.",
+    500: "Failed to remove client.",
+}
+
+
+def _validated (**types):
+    """
+    Checks the types of the given arguments before the decorated method is called
+    raises a ValueError if an argument has the wrong type
+
+    @_validated(username=str, password=str)
+
+    only for methods that are called seldom (__init__, register_client), never for the ones on the hot path
+    with python -O the checks are left out and the method is called directly
+    """
+    def decorator (func):
+        if not __debug__:
+            return func
+
+        #position and default of every checked argument are looked up once, not on every call
+        parameters = list(inspect.signature(func).parameters.values())
+        checks = []
+        for name, expected in types.items():
+            index = next(i for i, parameter in enumerate(parameters) if parameter.name == name)
+            default = parameters[index].default
+            checks.append((name, index, default, expected))
+
+        @functools.wraps(func)
+        def wrapper (*args, **kwargs):
+            for name, index, default, expected in checks:
+                if name in kwargs:
+                    value = kwargs[name]
+                elif index < len(args):
+                    value = args[index]
+                elif default is not inspect.Parameter.empty:
+                    value = default
+                else:
+                    #missing argument, the call itself raises the TypeError
+                    continue
+                if not isinstance(value, expected):
+                    raise ValueError(f'{name} has to be of type {expected} but is {type(value)}')
+            return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class ValueBatch:
+    """
+    Collects values and sets all of them with one request when the with block is left
+
+    with control.batch() as batch:
+        batch.add(dimmer.Brightness_uid, 50)
+        batch.add(switch.OnOff_uid, 1)
+    """
+
+    __slots__ = ("control", "changes", "result")
+
+    def __init__ (self, control):
+        self.control = control
+        self.changes = []
+        self.result = None
+
+    def add (self, uid: str, value: Any):
+        """
+        Adds one value for the uid/Datapoint to the batch
+        """
+        self.changes.append((uid, value))
+
+    def __enter__ (self):
+        return self
+
+    def __exit__ (self, exc_type, exc_value, traceback):
+        if exc_type == None and self.changes != []:
+            self.result = self.control.set_values(self.changes)
+        return False
 
 
 class GiraControl:
 
-    def __init__ (self, ip:str = None, client_id: str = 'de.GiraControl.defaultclient'):
+    __slots__ = ("session", "ip", "_token", "client_id", "_api", "_uid_url", "_uiconfig_url", "_values_url", "uid", "uid_config", "device_list",
+                 "_by_uid", "_by_dp_uid", "_configs_by_uid", "_configs_by_name", "_indexed_config",
+                 "_uid_config_ts", "_uid_config_ttl", "_uid_config_cache", "_token_cache", "_executor", "_push_ttl",
+                 "callback_server")
+
+    @_validated(ip=str, client_id=str, ca_bundle=(str, type(None)))
+    def __init__ (self, ip:str = None, client_id: str = 'de.GiraControl.defaultclient', ca_bundle: str = None, keep_alive: bool = True):
         """
         This is creates an Object to handle and interacht with the Gira IoT API
 
         ip: str = IP-Adress of the Gira X1
         client_id: str = To ensure uniqueness client identifiers have to be URNs within the organization of the client (de.GiraControl.defaultclient)
+        ca_bundle: str = file with the certificate of the X1, it is then verified (if left empty the certificate is not checked)
+        keep_alive: bool = if False the connection is closed after every request (for scripts that only send one command)
         """
 
-        #Check for valid inputs
-        if type(ip) != str:
-            raise ValueError(f'username has to be of type string but is {type(ip)}')
-        
-        if type(client_id) != str:
-            raise ValueError(f'password has to be of type string but is {type(client_id)}')
-        
-        requests.packages.urllib3.disable_warnings()
+        #one Session for all calls, so the TCP/TLS connection to the X1 is kept alive and reused
+        self.session = requests.Session()
+        self.session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=16, pool_block=False))
+        #verify is set once for the whole Session instead of on every call
+        self.session.verify = ca_bundle if ca_bundle != None else False
+        if ca_bundle == None:
+            #without a ca_bundle the certificate is not checked, urllib3 would warn about that on every request
+            urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+        self.session.headers['Content-Type'] = 'application/json'
+        self.session.headers['Connection'] = 'keep-alive' if keep_alive else 'close'
 
         self.ip = ip
+        #base of all urls, the ones containing the token are build by the token setter
+        self._api = f'https://{ip}/api'
+        self._by_uid = {}
         self.token = None
         self.client_id = client_id
         self.uid = None
         self.uid_config = None
         self.device_list = []
+        self._by_dp_uid = {}
+        self._configs_by_uid = {}
+        self._configs_by_name = {}
+        self._indexed_config = None
+
+        #the uid configuration only changes with a new GPA project download or app edits, so it is cached
+        self._uid_config_ts = 0
+        self._uid_config_ttl = 600
+        self._uid_config_cache = os.path.join(os.path.expanduser('~'), '.cache', 'x1_controller', f'uiconfig_{ip}.json')
+
+        #the token stays valid until the client is unregistered, so it is kept on disk for the next start
+        client_hash = hashlib.sha1(str(client_id).encode()).hexdigest()[:16]
+        self._token_cache = os.path.join(os.path.expanduser('~'), '.cache', 'x1_controller', f'token_{ip}_{client_hash}.json')
+
+        #threads for the concurrent calls, created on first use (as many as the Session keeps connections)
+        self._executor = None
+
+        #seconds the values of the devices are trusted once the X1 pushes them (None while they are polled)
+        self._push_ttl = None
+        #the server started by start_callback_server
+        self.callback_server = None
+
+    @property
+    def token (self) -> str:
+        """
+        The token of this client, it is returned by register_client
+        """
+        return self._token
+
+    @token.setter
+    def token (self, token: str):
+        #uid, uiconfig and values urls of the control are build once per token, the calls only read them
+        self._token = token
+        self._uid_url = f'{self._api}/v2/uiconfig/uid?token={token}'
+        self._uiconfig_url = f'{self._api}/uiconfig?token={token}'
+        self._values_url = f'{self._api}/values?token={token}'
+
+        #the devices already created keep working with the new token
+        for device in self._by_uid.values():
+            device.token = token
 
     def availability_check (self) -> bool:
         """
@@ -39,21 +181,21 @@ class GiraControl:
         returns True for availability
         and Error Code Else
         """
+        url = self._api + '/v2'
         try:
-            url = f'https://{self.ip}/api/v2'
-            response = requests.get(url,verify=False)
-
-            try:
-                response.json()
-                return response.json()
-            except:
-                if str(response).endswith('[200]>'):
-                    return True
-                else:
-                    return response
+            response = self.session.get(url)
         except Exception as e:
             return e
 
+        #the body is parsed once, straight from the bytes
+        try:
+            return Gira_Classes.json_loads(response.content)
+        except ValueError:
+            if response.status_code == 200:
+                return True
+            return response
+
+    @_validated(username=str, password=str)
     def register_client (self, username:str, password:str) -> str:
         """
         This method connects your device with the API and returns the token
@@ -65,31 +207,77 @@ class GiraControl:
         400 Bad Request  | missingContent | Body is empty/invalid.\n
         401 Unauthorized | invalidAuth    | Missing or invalid authentication.\n
         423 Locked       | locked         | The device is currently locked.\n
+
+        a token saved by an earlier registration is used again if the X1 still accepts it,
+        in that case the password is not checked, call invalidate_token_cache() to force a new registration
         """
-        #Check for valid inputs
-        if type(username) != str:
-            raise ValueError(f'username has to be of type string but is {type(username)}')
-        
-        if type(password) != str:
-            raise ValueError(f'password has to be of type string but is {type(password)}')
+        token = self._load_token_cache(username)
+        if token != None:
+            return token
 
+        body = Gira_Classes.json_dumps({"client": self.client_id})
+        url = self._api + '/v2/clients'
         try:
-            body = '{"client":"de.homeandfuture.FristTestClient"}'
-            url = f'https://{self.ip}/api/v2/clients'
-            response = requests.post(url, body, auth=(username, password), verify=False)
-            flag = True
-        except Exception as e:
-            response = e
-            flag = False
-
-        if flag:
-            try:
-                self.token = response.json()['token']
-                return self.token
-            except:
-                return f'Something went wrong {response.text}'
-        else:
-            return f'Something went wrong {response}'
+            response = self.session.post(url, body, auth=(username, password))
+        except requests.RequestException as e:
+            return f'Something went wrong {e}'
+
+        try:
+            self.token = Gira_Classes.json_loads(response.content)['token']
+        except (ValueError, KeyError, TypeError):
+            return f'Something went wrong {response.text}'
+
+        self._save_token_cache(username)
+        return self.token
+
+    def _load_token_cache (self, username: str):
+        """
+        Returns the saved token of the username if the X1 still accepts it, else None
+        """
+        try:
+            with open(self._token_cache, mode='rb') as f:
+                cache = Gira_Classes.json_loads(f.read())
+        except (OSError, ValueError):
+            return None
+
+        if not isinstance(cache, dict) or cache.get('username') != username or not isinstance(cache.get('token'), str):
+            return None
+
+        #the small uid request only works with a valid token
+        self.token = cache['token']
+        try:
+            response = self.session.get(self._uid_url)
+        except requests.RequestException:
+            response = None
+
+        if response != None and response.status_code == 200:
+            return self.token
+        self.token = None
+        return None
+
+    def _save_token_cache (self, username: str):
+        """
+        Saves the token of the username to disk, the file is replaced at once so it is never half written
+        only the current user can read the file and the directory (0600/0700)
+        """
+        tmp = self._token_cache + '.tmp'
+        try:
+            os.makedirs(os.path.dirname(self._token_cache), mode=0o700, exist_ok=True)
+            fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, mode='wb') as f:
+                f.write(Gira_Classes.json_dumps({"username": username, "token": self.token}))
+            os.replace(tmp, self._token_cache)
+        except OSError:
+            pass
+
+    def invalidate_token_cache (self):
+        """
+        This method removes the saved token, the next register_client registers at the X1 again
+        """
+        try:
+            os.remove(self._token_cache)
+        except OSError:
+            pass
 
     def unregister_client (self, token: str = None) -> str:
         """
@@ -106,55 +294,127 @@ class GiraControl:
 
         token = token or self.token
 
-        if type(token) != str:
+        if not isinstance(token, str):
             raise ValueError(f'token is not of type string but of type {type(token)}')
 
+        url = f'{self._api}/v2/clients/{token}?token={token}'
         try:
-            url = f'https://{self.ip}/api/v2/clients/{token}?token={token}'
-            response = requests.delete(url, verify=False)
-            flag = True
-        except Exception as e:
-            response = e
-            flag = False
-
-        if flag:
-            if str(response).endswith('[204]>'):
-                return "Client was successfully unregistered."
-            elif str(response).endswith('[401]>'):
-                return "The token cannot be found."
-            elif str(response).endswith('[423]>'):
-                return "The device is currently locked."
-            elif str(response).endswith('[500]>'):
-                return "Failed to remove client."
-            else:
-                return f'Something went wrong {response}'
-        else:
-            return f'Something went wrong {response}'
+            response = self.session.delete(url)
+        except requests.RequestException as e:
+            return f'Something went wrong {e}'
+
+        if response.status_code == 204 and token == self.token:
+            self.invalidate_token_cache()
+        return _UNREGISTER_MSGS.get(response.status_code, f'Something went wrong {response}')
 
     def register_callbacks (self, serviceCallback:str, valueCallback:str, testCallbacks:bool = None):
         """
-        I HAVE NEVER TESTED THIS METHOD
-        IT'S JUST HERE FOR COMPLETENES
+        This method registers the urls the X1 sends its events to (see Gira_Callbacks.CallbackServer)
+        Only one set of callback urls can be registered per token
+
+        serviceCallback: str = url for service events (e.g. a changed configuration)
+        valueCallback: str   = url for value events, they are stored with apply_values
+        testCallbacks: bool  = if True the X1 tests the urls first, they have to respond with 200 OK
         """
+        data = {
+                "serviceCallback": serviceCallback,
+                "valueCallback": valueCallback
+                }
+        if testCallbacks != None:
+            data["testCallbacks"] = testCallbacks
+
+        url = f'{self._api}/v2/clients/{self.token}/callbacks'
+        try:
+            response = self.session.post(url, data=Gira_Classes.json_dumps(data))
+        except requests.RequestException as e:
+            return f'Something went wrong {e}'
 
-        if testCallbacks == None:
-            data = {
-                    "serviceCallback": serviceCallback, 
-                    "valueCallback": valueCallback
-                    }
-        else:
-            data = {
-                    "serviceCallback": serviceCallback, 
-                    "valueCallback": valueCallback, 
-                    "testCallbacks": testCallbacks
-                    }
+        if response.status_code == 200:
+            return f'Everything went right'
+        return f'Something went wrong {response}'
 
-        try:
-            url = f'https://{self.ip}/api/v2/clients/{self.token}/callbacks'
-            response = requests.post(url, verify=False)
-            return response
-        except Exception as e:
-            return e
+    def apply_values (self, events: list) -> int:
+        """
+        This method stores the values of value events on the devices they belong to,
+        so they are known without polling the X1
+
+        events: list = list of {"uid": ..., "value": ...} dicts (the events of a value callback)
+        returns how many values were stored, events that are no dict, without uid or of devices that were not created yet are skipped
+        """
+        stored = 0
+        for event in events:
+            uid = event.get('uid') if isinstance(event, dict) else None
+            if uid == None:
+                continue
+            device = self._by_dp_uid.get(uid)
+            if device != None and device.apply_value(uid, event.get('value')):
+                stored += 1
+        return stored
+
+    def start_callback_server (self, host: str, port: int = 5523, certfile: str = None, keyfile: str = None, testCallbacks: bool = None):
+        """
+        This method starts a Gira_Callbacks.CallbackServer and registers its urls at the X1
+        from then on the X1 pushes the values to the devices, so they do not have to be polled with update_values
+
+        host: str           = IP-Adress of this computer as the X1 can reach it
+        port: int           = port the server listens on
+        certfile: str       = certificate for HTTPS (the X1 only calls HTTPS urls)
+        keyfile: str        = private key of the certificate
+        testCallbacks: bool = if True the X1 tests the urls first
+
+        returns the running server (stop it with stop_callback_server()) or the error of the registration
+
+        while the values are pushed, update_values and toggle only ask the X1 once a minute to reconcile
+        """
+        #only one set of callback urls can be registered per token
+        self.stop_callback_server()
+
+        #values are only stored on devices that exist, so all of them are created first
+        self.get_devices()
+
+        server = Gira_Callbacks.CallbackServer(self, host, port=port, certfile=certfile, keyfile=keyfile)
+        server.start()
+
+        result = self.register_callbacks(server.service_url, server.value_url, testCallbacks=testCallbacks)
+        if result != 'Everything went right':
+            server.stop()
+            return result
+
+        self.callback_server = server
+        self._push_ttl = 60
+        for device in self._by_uid.values():
+            self._apply_push_ttl(device)
+        return server
+
+    def stop_callback_server (self):
+        """
+        This method stops the server of start_callback_server
+        the devices poll the X1 again like before, as no more values are pushed to them
+        """
+        server = self.callback_server
+        self.callback_server = None
+        self._push_ttl = None
+        for device in self._by_uid.values():
+            self._reset_push_ttl(device)
+
+        if server != None:
+            server.stop()
+
+    def _apply_push_ttl (self, device):
+        """
+        Lets the device trust its values for _push_ttl seconds, the X1 pushes every change to it
+        """
+        device.values_ttl = self._push_ttl
+        if isinstance(device, Gira_Classes.OnOffDevice):
+            device.toggle_cache_ttl = self._push_ttl
+
+    def _reset_push_ttl (self, device):
+        """
+        Lets the device trust its values only as long as without pushed values
+        """
+        device.values_ttl = Gira_Classes.VALUES_TTL
+        if isinstance(device, Gira_Classes.OnOffDevice):
+            device.toggle_cache_ttl = Gira_Classes.TOGGLE_CACHE_TTL
 
     def get_uid (self):
         """
@@ -164,122 +424,358 @@ class GiraControl:
         """
 
         try:
-            url = f'https://{self.ip}/api/v2/uiconfig/uid?token={self.token}'
-            response = requests.get(url, verify=False)
-            flag = True
-        except Exception as e:
-            response = e
-            flag = False
-
-        if flag:
-            try:
-                self.uid = response.json()['uid']
-                return self.uid
-            except:
-                return f'Something went wrong {response}'
-        else:
+            response = self.session.get(self._uid_url)
+        except requests.RequestException as e:
+            return f'Something went wrong {e}'
+
+        try:
+            uid = Gira_Classes.json_loads(response.content)['uid']
+        except (ValueError, KeyError, TypeError):
             return f'Something went wrong {response}'
 
-    def get_uid_config (self, filename:str = None):
+        #a new uid means the configuration on the X1 has changed
+        if self.uid != None and uid != self.uid:
+            self.invalidate_config()
+        self.uid = uid
+        return self.uid
+
+    def invalidate_config (self):
+        """
+        This method clears the cached configuration and the devices created from it
+        the next call of get_uid_config will load the configuration from the X1 again
+        """
+        #the old devices get no more pushed values, so they must not trust their values longer than usual
+        if self._push_ttl != None:
+            for device in self._by_uid.values():
+                self._reset_push_ttl(device)
+
+        self.uid_config = None
+        self._uid_config_ts = 0
+        self.device_list = []
+        self._by_uid = {}
+        self._by_dp_uid = {}
+        self._configs_by_uid = {}
+        self._configs_by_name = {}
+        self._indexed_config = None
+
+        try:
+            os.remove(self._uid_config_cache)
+        except OSError:
+            pass
+
+    def _load_uid_config_cache (self):
+        """
+        Returns the configuration saved on disk if it belongs to the current uid, else None
+        """
+        if self.uid == None:
+            return None
+
+        try:
+            with open(self._uid_config_cache, mode='rb') as f:
+                config = Gira_Classes.json_loads(f.read())
+        except (OSError, ValueError):
+            return None
+
+        if config.get('uid') == self.uid:
+            return config
+        return None
+
+    def _save_uid_config_cache (self, content: bytes):
+        """
+        Saves the downloaded configuration to disk so a restart does not have to download it again
+        the raw body is written as it is and the file is replaced at once so it is never half written
+        """
+        tmp = self._uid_config_cache + '.tmp'
+        try:
+            os.makedirs(os.path.dirname(self._uid_config_cache), exist_ok=True)
+            with open(tmp, mode='wb') as f:
+                f.write(content)
+            os.replace(tmp, self._uid_config_cache)
+        except OSError:
+            pass
+
+    def get_uid_config (self, filename:str = None, force:bool = False):
         """
         This method loads the configuration currently on the X1
 
         filename: .JSON   -  the config can be saved to a file with specified filename (if left empty it wont be saved)
-        """
-        if filename != None and type(filename) != str:
-            raise ValueError(f'filename has to be of type string but is {type(filename)}')
+        force: bool       -  ignore the cached configuration and download it again
 
+        the configuration is cached for 10 minutes (_uid_config_ttl) and on disk for the current uid,
+        after that only the uid is checked and the configuration is downloaded again if it has changed
+        """
+        #checked here and not with _validated, every get_device/get_devices calls this method
+        if filename != None and not isinstance(filename, str):
+            raise ValueError(f'filename has to be of type str but is {type(filename)}')
+
+        content = None
+        if force or self.uid_config == None or time.monotonic() - self._uid_config_ts >= self._uid_config_ttl:
+            config = None
+            if not force:
+                #the small uid tells if the cached configuration is still the one on the X1 (get_uid clears it if not)
+                self.get_uid()
+                if self.uid_config != None and self.uid_config.get('uid') == self.uid:
+                    config = self.uid_config
+                else:
+                    config = self._load_uid_config_cache()
+
+            if config == None:
+                content = self._download_uid_config()
+                if isinstance(content, str):
+                    return content
+                try:
+                    config = Gira_Classes.json_loads(content)
+                except ValueError:
+                    return f'Something went wrong {content[:100]}'
+                self._save_uid_config_cache(content)
+            self.uid_config = config
+            self._uid_config_ts = time.monotonic()
+
+        if filename != None:
+            with open(filename, mode='wb') as f:
+                #a fresh download is written as it is, without encoding it again
+                f.write(content if content != None else Gira_Classes.json_dumps(self.uid_config, indent=True))
+        return self.uid_config
+
+    def _download_uid_config (self):
+        """
+        Downloads the configuration from the X1 and returns the raw JSON body
+        """
         try:
-            url = f'https://{self.ip}/api/uiconfig?token={self.token}'
-            response = requests.get(url, verify=False)
-            flag = True
-        except Exception as e:
-            response = e
-            flag = False
-
-        if flag:
-            try:
-                self.uid_config = response.json()
-            except:
-                return f'Something went wrong {response}'
-            
-            if filename != None:
-                with open(filename, mode='w') as f:
-                    json.dump(response.json(),f,indent=5)
-                return response.json()
-            else:
-                return response.json()
-        else:
-            return f'Something went wrong {response}'
+            response = self.session.get(self._uiconfig_url)
+        except requests.RequestException as e:
+            return f'Something went wrong {e}'
+
+        if response.status_code == 200:
+            return response.content
+        return f'Something went wrong {response}'
+
+    def _index_config (self):
+        """
+        Indexes the functions of the (cached) uid configuration by uid and displayName
+        the device objects themselves are only created when they are needed
+        """
+        #first let's get the uid Configuration (cached)
+        self.get_uid_config()
+
+        if self._indexed_config is self.uid_config:
+            return
+
+        configs_by_uid = {}
+        configs_by_name = {}
+        registry = Gira_Classes.DEVICE_REGISTRY
+        for config in self.uid_config['functions']:
+            #interned once here, so this and every later registry lookup compares pointers
+            channel = config['channelType'] = sys.intern(config['channelType'])
+            #only channel types with a class are devices
+            if channel in registry:
+                configs_by_uid[config['uid']] = config
+                #the first device with a displayName wins, just like a scan of the list would
+                configs_by_name.setdefault(config['displayName'], config)
+
+        #devices of functions that did not change are kept, so the objects held by the user still get the pushed values and tokens
+        by_uid = {}
+        by_dp_uid = {}
+        for uid, device in self._by_uid.items():
+            config = configs_by_uid.get(uid)
+            if config != None and config == self._configs_by_uid.get(uid):
+                by_uid[uid] = device
+                for datapoint in config['dataPoints']:
+                    by_dp_uid[datapoint['uid']] = device
+            elif self._push_ttl != None:
+                #the dropped devices get no more pushed values, so they must not trust their values longer than usual
+                self._reset_push_ttl(device)
+
+        self._configs_by_uid = configs_by_uid
+        self._configs_by_name = configs_by_name
+        self._by_uid = by_uid
+        self._by_dp_uid = by_dp_uid
+        self.device_list = []
+        self._indexed_config = self.uid_config
+
+    def _device_for (self, config: dict):
+        """
+        Returns the device object for a function, it is created on the first call
+        """
+        device = self._by_uid.get(config['uid'])
+        if device is None:
+            #the configs are indexed only for channel types with a class, so the class is looked up directly
+            cls = Gira_Classes.DEVICE_REGISTRY[config['channelType']]
+            device = cls(ip=self.ip, token=self._token, config=config, session=self.session)
+            #the async methods of the device share the thread pool of the control
+            device.executor = self._get_executor()
+            if self._push_ttl != None:
+                self._apply_push_ttl(device)
+            self._by_uid[config['uid']] = device
+            #datapoint uid -> device, for the value events
+            for datapoint in config['dataPoints']:
+                self._by_dp_uid[datapoint['uid']] = device
+        return device
 
     def get_devices (self)-> list:
         """
         This method returns a list of all devices as their own objects
         """
-        devices_list = []
-
-        #first let's get the uid Configuration
-        if self.uid_config == None:
-            self.get_uid_config()
-
-        functions = self.uid_config['functions']
-        for config in functions:
-            
-            #sorting all the Devices into their own Classes
-
-            if config['channelType'] == "de.gira.schema.channels.KNX.Dimmer":
-                devices_list.append(Gira_Classes.KNXDimmer(ip= self.ip, token=self.token, config=config))
-            elif config['channelType'] == "de.gira.schema.channels.Sonos.Audio":
-                pass
-            elif config['channelType'] == "de.gira.schema.channels.Trigger":
-                pass
-            elif config['channelType'] == "de.gira.schema.channels.RA.RemoteAccess":
-                pass
-            elif config['channelType'] == "de.gira.schema.channels.Float":
-                pass
-            elif config['channelType'] == "de.gira.schema.channels.Binary":
-                pass
-            elif config['channelType'] == "de.gira.schema.channels.BlindWithPos":
-                pass
-            elif config['channelType'] == "de.gira.schema.channels.Switch":
-                devices_list.append(Gira_Classes.Switch(ip= self.ip, token=self.token, config=config))
-            elif config['channelType'] == "de.gira.schema.channels.FunctionScene":
-                pass
-            elif config['channelType'] == "de.gira.schema.channels.String":
-                pass
+        self._index_config()
+
+        #the devices have already been created from this configuration
+        if self.device_list != []:
+            return self.device_list
 
         #updating the global variable
-        self.device_list = devices_list
-        return devices_list
+        self.device_list = [self._device_for(config) for config in self._configs_by_uid.values()]
+        return self.device_list
+
+    def set_values (self, changes: list):
+        """
+        This method sets the values of several uids/Datapoints with one request
+
+        changes: list = list of (uid, value) or (device, name, value) tuples
+                        name is the datapoint name as in the config or the attributes of the device (e.g. 'Brightness', 'Step-Up-Down')
+
+        raises a ValueError if a device does not have the datapoint
+
+        control.set_values([(dimmer, 'Brightness', 50), (switch.OnOff_uid, 1)])
+        """
+        values = []
+        #device -> (uid, value) tuples written to it
+        written = {}
+        for change in changes:
+            if len(change) == 3:
+                device, name, value = change
+                uid = device.datapoint_uid(name)
+            else:
+                uid, value = change
+                device = self._by_dp_uid.get(uid)
+            values.append({"uid": uid, "value": value})
+            if device != None:
+                written.setdefault(device, []).append((uid, value))
+
+        body = {"values": values}
+        try:
+            response = self.session.put(self._values_url, data=Gira_Classes.json_dumps(body))
+        except requests.RequestException as e:
+            return f'Something went wrong {e}'
+
+        if response.status_code == 200:
+            #the devices know their new values without asking the X1
+            for device, device_changes in written.items():
+                device.apply_written(device_changes)
+            return f'Everything went right'
+        return f'Something went wrong {response}'
+
+    def set_value (self, uid: str, value: Any):
+        """
+        This method sets the value of one uid/Datapoint
+        """
+        return self.set_values([(uid, value)])
+
+    def batch (self) -> ValueBatch:
+        """
+        Returns a ValueBatch, all values added to it are set with one request at the end of the with block
+        """
+        return ValueBatch(self)
+
+    def _get_executor (self) -> ThreadPoolExecutor:
+        """
+        Returns the thread pool for the concurrent calls
+        """
+        if self._executor == None:
+            self._executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix='GiraControl')
+        return self._executor
+
+    def update_all_sync (self) -> list:
+        """
+        This method updates the values of all devices concurrently, without asyncio
+
+        returns a list with the result of update_values for every device
+        """
+        return self.run_all_sync('update_values')
+
+    def _methods_of (self, method: str, devices: list = None) -> list:
+        """
+        Returns the bound methods for run_all/run_all_sync, all of them are looked up before the first one is called
+        without devices all devices that have the method are used (e.g. a BlindWithPos has no toggle)
+        """
+        if devices == None:
+            return [getattr(device, method) for device in self.get_devices() if hasattr(device, method)]
+
+        methods = []
+        for device in devices:
+            bound = getattr(device, method, None)
+            if bound == None:
+                raise ValueError(f'{device.displayName} has no method {method}')
+            methods.append(bound)
+        return methods
+
+    def run_all_sync (self, method: str, *args, devices: list = None) -> list:
+        """
+        This method calls the same method on several devices concurrently, without asyncio
+
+        method: str   = name of the device method (e.g. 'toggle', 'update_values')
+        *args         = arguments for the method
+        devices: list = the devices to use (if left empty all devices that have the method are used)
+
+        control.run_all_sync('dimm_to', 30, devices=[kitchen, living_room])
+        control.run_all_sync('toggle')  #every device with a toggle, blinds and value types are left out
+        returns a list with the result for every device used
+        raises a ValueError before anything is sent if one of the given devices does not have the method
+        """
+        methods = self._methods_of(method, devices)
+        executor = self._get_executor()
+        futures = [executor.submit(bound, *args) for bound in methods]
+        return [future.result() for future in futures]
+
+    async def update_all (self) -> list:
+        """
+        This method updates the values of all devices concurrently
+
+        The requests are send at the same time over the shared Session,
+        so polling N devices takes about as long as the slowest device instead of the sum of all.
+        returns a list with the result of update_values for every device
+        """
+        return await self.run_all('update_values')
+
+    async def run_all (self, method: str, *args, devices: list = None) -> list:
+        """
+        This method calls the same method on several devices concurrently
+
+        method: str   = name of the device method (e.g. 'toggle', 'update_values')
+        *args         = arguments for the method
+        devices: list = the devices to use (if left empty all devices that have the method are used)
+
+        await control.run_all('dimm_to', 30, devices=[kitchen, living_room])
+        await control.run_all('turn_off')  #every device with a turn_off, blinds and value types are left out
+        returns a list with the result for every device used
+        raises a ValueError before anything is sent if one of the given devices does not have the method
+        """
+        methods = self._methods_of(method, devices)
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        tasks = [loop.run_in_executor(executor, bound, *args) for bound in methods]
+        return await asyncio.gather(*tasks)
+
+    async def set_values_async (self, changes: list):
+        """
+        async version of set_values, all values are still set with one request
+        while it waits for the X1 the event loop can go on with other tasks
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), self.set_values, changes)
 
     def get_device (self, displayName:str = None, uid:str = None)-> Gira_Classes.KNXDimmer:
         """
         returns the device with the DisplayName or the uid - only must be given
         uid > Displayname
+        returns None if no device matches
         """
-        #Value Checking
-        if displayName == None and uid == None:
-            raise ValueError('No values are given')
-        
-        if type(displayName) != str and displayName != None:
-            raise ValueError(f'DisplayName has to be of type string but is {type(displayName)}')
-
-        if type(uid) != str and uid != None:
-            raise ValueError(f'uid has to be of type string but is {type(uid)}')
-
-        #catching the devices if it hasen't been done yet
-        if self.device_list == []:
-            self.get_devices()
-
-        if displayName != None and uid != None:
-            for device in self.device_list:
-                if device.uid == uid:
-                    return device
-        elif displayName == None and uid != None:
-            for device in self.device_list:
-                if device.uid == uid:
-                    return device
-        elif displayName != None and uid == None:
-            for device in self.device_list:
-                if device.displayName == displayName:
-                    return device
+        self._index_config()
+
+        if uid != None:
+            config = self._configs_by_uid.get(uid)
+        else:
+            config = self._configs_by_name.get(displayName)
+
+        if config is None:
+            return None
+        return self._device_for(config)